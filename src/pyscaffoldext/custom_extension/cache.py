@@ -0,0 +1,238 @@
+"""Content-addressed on-disk cache for the files generated by :obj:`CustomExtension`.
+
+When the ``--generation-cache DIR`` option is given, the files written by PyScaffold
+for a new project are stored in ``DIR``, under a key computed from:
+
+- the (normalized) scaffold options,
+- the hashes of this extension's templates,
+- the versions of PyScaffold, of this extension and of the distributions providing
+  the other activated extensions.
+
+The cache is looked up right after the options are processed. When the same inputs
+were used before, the actions of this extension building the project structure do
+nothing and the cached structure is written straight to the disk, without rendering
+any template.
+Only the files are cached: the remaining actions (e.g. ``git init``, venv creation or
+``pre-commit install``) still run as usual. Updates (``--update``) never use the cache.
+
+Note:
+    Files written with the :obj:`~pyscaffoldext.custom_extension.operations.stream`
+    file operation are not in the project structure (just a placeholder is), so when
+    any written file does not match its contents in the structure, nothing is cached.
+
+Old entries are evicted after each store: first the ones older than
+:obj:`MAX_AGE`, then the least recently used ones until the cache is smaller than
+:obj:`MAX_SIZE`.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import suppress
+from functools import wraps
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pyscaffold.actions import Action, ActionParams, ScaffoldOpts, Structure
+from pyscaffold.extensions import Extension
+from pyscaffold.log import logger
+from pyscaffold.update import pyscaffold_version
+
+from . import __version__, templates
+
+if sys.version_info[:2] >= (3, 8):
+    # TODO: Import directly (no need for conditional) when `python_requires = >= 3.8`
+    from importlib.metadata import PackageNotFoundError, version  # pragma: no cover
+else:
+    from importlib_metadata import PackageNotFoundError, version  # pragma: no cover
+
+MAX_SIZE = 100 * 1024**2
+"""Maximum size of the cache directory (bytes)"""
+
+MAX_AGE = 30 * 24 * 60 * 60
+"""Maximum age of a cache entry since it was last used (seconds)"""
+
+VOLATILE_OPTIONS = {
+    "cache_key",
+    "cached_structure",
+    "command",
+    "config_files",
+    "force",
+    "generation_cache",
+    "log_level",
+    "pretend",
+    "profile_memory",
+    "project_path",
+    "update",
+    "venv",
+}
+"""Options not affecting the generated files (or handled outside of the cache)"""
+
+
+def lookup_cache(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
+    """Load the cached project structure (when existing) into the
+    ``cached_structure`` option, so the actions decorated with :obj:`unless_cached`
+    are skipped. See :obj:`pyscaffold.actions.Action`.
+    """
+    cache_dir = opts.get("generation_cache")
+    if not cache_dir or opts.get("update"):
+        return struct, opts
+
+    key = cache_key(opts)
+    entry = Path(cache_dir, f"{key}.json")
+    if not entry.exists():
+        return struct, {**opts, "cache_key": key}
+
+    logger.report("cached", entry)
+    os.utime(entry)  # keep track of the last usage, see ``evict``
+    cached = json.loads(entry.read_text(encoding="utf-8"))
+    return struct, {**opts, "cached_structure": cached}
+
+
+def unless_cached(action: Action) -> Action:
+    """Decorate a PyScaffold action building the project structure, so it does
+    nothing when the structure was found by :obj:`lookup_cache`
+    """
+
+    @wraps(action)
+    def _unless_cached(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
+        if opts.get("cached_structure") is not None:
+            return struct, opts
+        return action(struct, opts)
+
+    return _unless_cached
+
+
+def restore_from_cache(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
+    """Replace the project structure with the one found by :obj:`lookup_cache`.
+    See :obj:`pyscaffold.actions.Action`.
+    """
+    cached = opts.get("cached_structure")
+    if cached is None:
+        return struct, opts
+    return cached, opts
+
+
+def store_in_cache(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
+    """Store the structure returned by :obj:`pyscaffold.structure.create_structure`
+    (i.e. the files actually written, with their final contents) in the cache.
+    See :obj:`pyscaffold.actions.Action`.
+    """
+    cache_dir = opts.get("generation_cache")
+    key = opts.get("cache_key")
+    if not cache_dir or not key or opts.get("pretend"):
+        return struct, opts
+
+    if not matches_disk(struct, Path(opts["project_path"])):
+        logger.warning("Generated files differ from the project structure, not cached")
+        return struct, opts
+
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    entry = cache_dir / f"{key}.json"
+    tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(struct), encoding="utf-8")
+    tmp.replace(entry)  # atomic, concurrent CI jobs might share the cache
+    evict(cache_dir)
+
+    return struct, opts
+
+
+def cache_key(opts: ScaffoldOpts) -> str:
+    """Hash of all the inputs that influence the generated files"""
+    normalized = {k: v for k, v in opts.items() if k not in VOLATILE_OPTIONS}
+    normalized["extensions"] = sorted(e.name for e in opts.get("extensions", []))
+    inputs = {
+        "opts": normalized,
+        "templates": templates_hash(),
+        "pyscaffold": pyscaffold_version,
+        "custom_extension": __version__,
+        "distributions": extension_versions(opts.get("extensions", [])),
+    }
+    serialized = json.dumps(inputs, sort_keys=True, default=str)
+    return sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def extension_versions(extensions: List[Extension]) -> Dict[str, Optional[str]]:
+    """Version of the distribution providing each extension (``None`` if unknown),
+    guessed from the longest prefix of its module name, e.g.
+    ``pyscaffoldext.markdown.extension`` => ``pyscaffoldext-markdown``
+    """
+    versions = {}
+    for ext in extensions:
+        parts = type(ext).__module__.split(".")
+        names = ("-".join(parts[:i]) for i in range(len(parts), 0, -1))
+        candidates = (name.replace("_", "-") for name in names)
+        versions[ext.name] = next(filter(None, map(_version, candidates)), None)
+    return versions
+
+
+def matches_disk(struct: Structure, root: Path) -> bool:
+    """Check if the sizes of the files written under ``root`` correspond to the
+    contents in ``struct`` (e.g. streamed files only have a placeholder in ``struct``)
+    """
+    for name, node in struct.items():
+        path = root / name
+        if isinstance(node, dict):
+            if not matches_disk(node, path):
+                return False
+        elif isinstance(node, str):
+            size = len(node.replace("\n", os.linesep).encode("utf-8"))
+            # ^  ``Path.write_text`` translates the new lines
+            if _size(path) != size:
+                return False
+    return True
+
+
+def templates_hash() -> str:
+    digest = sha256()
+    for path in sorted(Path(templates.__file__).parent.glob("*.template")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def evict(
+    cache_dir: Path, max_size: int = MAX_SIZE, max_age: float = MAX_AGE
+) -> List[Path]:
+    """Remove expired entries and then the least recently used ones until the cache
+    fits in ``max_size``. Returns the removed entries.
+    """
+    entries = []
+    for path in cache_dir.glob("*.json"):
+        stat = _stat(path)
+        if stat:  # might have been removed concurrently
+            entries.append((path, stat))
+    entries.sort(key=lambda entry: entry[1].st_mtime)
+
+    now = time.time()
+    total = sum(stat.st_size for _, stat in entries)
+    removed = []
+    for path, stat in entries:
+        if now - stat.st_mtime <= max_age and total <= max_size:
+            break
+        with suppress(FileNotFoundError):
+            path.unlink()
+        total -= stat.st_size
+        removed.append(path)
+    return removed
+
+
+def _version(dist_name: str) -> Optional[str]:
+    try:
+        return version(dist_name)
+    except PackageNotFoundError:
+        return None
+
+
+def _size(path: Path) -> Optional[int]:
+    stat = _stat(path)
+    return stat.st_size if stat else None
+
+
+def _stat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
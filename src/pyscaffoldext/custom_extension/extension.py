@@ -1,21 +1,24 @@
 """Main logic to create custom extensions"""
+import re
+from configparser import Error as ConfigError
 from functools import partial, reduce
-from typing import List
+from typing import List, cast
 
 from packaging.version import Version
 from pyscaffold import dependencies as deps
-from pyscaffold.actions import Action, ActionParams, ScaffoldOpts, Structure
+from pyscaffold.actions import Action, ActionParams, ScaffoldOpts, Structure, get_id
 from pyscaffold.extensions import Extension, include
 from pyscaffold.extensions.cirrus import Cirrus
 from pyscaffold.extensions.namespace import Namespace
 from pyscaffold.extensions.no_skeleton import NoSkeleton
 from pyscaffold.extensions.pre_commit import PreCommit
+from pyscaffold.identification import is_valid_identifier, underscore
+from pyscaffold.info import read_setupcfg
 from pyscaffold.log import logger
 from pyscaffold.operations import no_overwrite
 from pyscaffold.structure import (
     Leaf,
     ResolvedLeaf,
-    merge,
     reify_content,
     reify_leaf,
     resolve_leaf,
@@ -24,9 +27,12 @@ from pyscaffold.templates import get_template
 from pyscaffold.update import ConfigUpdater, pyscaffold_version
 
 from . import templates
+from .cache import lookup_cache, restore_from_cache, store_in_cache, unless_cached
+from .profiling import profiled
 
 PYSCAFFOLDEXT_NS = "pyscaffoldext"
 EXTENSION_FILE_NAME = "extension"
+DISPATCHER_FILE_NAME = "lazy"
 NO_OVERWRITE = no_overwrite()
 DOC_REQUIREMENTS = ["pyscaffold"]
 TEST_DEPENDENCIES = (
@@ -39,6 +45,25 @@ TEST_DEPENDENCIES = (
     "pytest-cov",
     "pytest-xdist",
 )
+PYTEST_MARKERS = (
+    "slow: mark tests as slow (deselected by default, select with '-m slow')",
+    "system: mark end-to-end system tests (deselected by default, select with "
+    "'-m system')",
+)
+PYTEST_OPTIONS = (
+    '-m "not slow and not system"',
+    "--numprocesses auto",
+)
+"""Only fast tests by default, in parallel (override with ``pytest -m "" -n 0``)"""
+
+CIRRUS_PIP_CACHE = re.compile(
+    r"^(?P<indent> +)pip_cache:\n"
+    r"(?P<body>(?:(?P=indent) +.*\n)*?)"
+    r"(?P=indent) +fingerprint_script: (?P<fingerprint>.*)\n"
+    r"(?P<tail>(?:(?P=indent) +.*\n)*)",
+    re.MULTILINE,
+)
+"""``pip_cache`` blocks in the Cirrus CI config generated by PyScaffold"""
 
 INVALID_PROJECT_NAME = (
     "The prefix ``pyscaffoldext-`` will be added to the package name "
@@ -63,6 +88,18 @@ class NamespaceError(RuntimeError):
         super().__init__(message, *args, **kwargs)
 
 
+class InvalidExtensionName(RuntimeError):
+    """The given name cannot be used for an extension"""
+
+    DEFAULT_MESSAGE = (
+        "Extension names should be valid Python identifiers "
+        f"(different from ``{DISPATCHER_FILE_NAME}``)."
+    )
+
+    def __init__(self, message=DEFAULT_MESSAGE, *args, **kwargs):
+        super().__init__(message, *args, **kwargs)
+
+
 class CustomExtension(Extension):
     """Configures a project to start creating extensions"""
 
@@ -84,13 +121,43 @@ class CustomExtension(Extension):
             nargs=0,
             action=include(NoSkeleton(), Namespace(), PreCommit(), Cirrus(), self),
         )
+        parser.add_argument(
+            "--extension-names",
+            dest="extension_names",
+            nargs="+",
+            metavar="NAME",
+            help="names of the extensions hosted by the generated package, "
+            "each one with its own entry point. When more than one name is given, "
+            "a dispatcher module imports each extension only when its flag is used "
+            "(default: PACKAGE, requires --custom-extension)",
+        )
+        parser.add_argument(
+            "--profile-memory",
+            dest="profile_memory",
+            metavar="REPORT",
+            help="append peak memory and top allocation sites of each action of "
+            "--custom-extension to the REPORT file (JSON Lines)",
+        )
+        parser.add_argument(
+            "--generation-cache",
+            dest="generation_cache",
+            metavar="DIR",
+            help="reuse the files generated by previous runs with the same inputs, "
+            "stored in the DIR cache (requires --custom-extension)",
+        )
         return self
 
     def activate(self, actions: List[Action]) -> List[Action]:
         """Activate extension, see :obj:`~pyscaffold.extension.Extension.activate`."""
-        actions = self.register(actions, process_options, after="get_default_options")
-        actions = self.register(actions, add_doc_requirements)
-        actions = self.register(actions, add_files)
+        process = profiled(process_options)
+        actions = self.register(actions, process, after="get_default_options")
+        actions = self.register(actions, lookup_cache, after=get_id(process))
+        actions = self.register(actions, profiled(unless_cached(add_doc_requirements)))
+        actions = self.register(actions, profiled(unless_cached(add_files)))
+        ci = profiled(unless_cached(add_system_tests_ci))
+        actions = self.register(actions, ci, before="verify_project_dir")
+        actions = self.register(actions, restore_from_cache, before="create_structure")
+        actions = self.register(actions, store_in_cache, after="create_structure")
         return actions
 
 
@@ -123,9 +190,22 @@ def process_options(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
 
     opts["requirements"] = deps.add(opts.get("requirements", []), get_requirements())
 
-    # set another derived parameter used in the templates
-    class_name = "".join(map(str.capitalize, opts["package"].split("_")))
-    return struct, {**opts, "extension_class_name": class_name}
+    given = opts.get("extension_names") or existing_extension_names(opts)
+    if isinstance(given, str):  # persisted in the ``[pyscaffold]`` section
+        given = given.split()
+    names = [underscore(n) for n in given or [opts["package"]]]
+    if not all(map(is_valid_identifier, names)) or DISPATCHER_FILE_NAME in names:
+        raise InvalidExtensionName()
+    opts["extension_names"] = list(dict.fromkeys(names))  # dedup, preserving order
+
+    # set other derived parameters used in the templates
+    first = opts["extension_names"][0]
+    module = first if is_lazy(opts) else EXTENSION_FILE_NAME
+    return struct, {
+        **opts,
+        "extension_class_name": class_name(first),
+        "extension_module": module,
+    }
 
 
 def add_files(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
@@ -140,11 +220,7 @@ def add_files(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
         "README.rst": (template("readme"), NO_OVERWRITE),
         "CONTRIBUTING.rst": (template("contributing"), NO_OVERWRITE),
         "setup.cfg": modify_setupcfg(struct["setup.cfg"], opts),
-        "src": {
-            opts["package"]: {
-                f"{EXTENSION_FILE_NAME}.py": (template("extension"), NO_OVERWRITE)
-            }
-        },
+        "src": {opts["package"]: extension_files(opts)},
         "tests": {
             "__init__.py": ("", NO_OVERWRITE),
             "conftest.py": (template("conftest"), NO_OVERWRITE),
@@ -156,7 +232,45 @@ def add_files(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
         },
     }
 
-    return merge(struct, files), opts
+    return shared_merge(struct, files), opts
+
+
+def extension_files(opts: ScaffoldOpts) -> Structure:
+    """Python modules implementing the extensions (and the lazy dispatcher, when
+    the generated package hosts more than one extension)
+    """
+    if not is_lazy(opts):
+        return {f"{EXTENSION_FILE_NAME}.py": (template("extension"), NO_OVERWRITE)}
+
+    files: Structure = {
+        f"{name}.py": (partial(render_extension, name), NO_OVERWRITE)
+        for name in opts["extension_names"]
+    }
+    files[f"{DISPATCHER_FILE_NAME}.py"] = (render_dispatcher, NO_OVERWRITE)
+    return files
+
+
+def render_extension(name: str, opts: ScaffoldOpts) -> str:
+    """Render the extension template for the extension called ``name``"""
+    values = {**opts, "extension_class_name": class_name(name)}
+    return template("extension").safe_substitute(values)
+
+
+def render_dispatcher(opts: ScaffoldOpts) -> str:
+    """Render the lazy dispatcher module with one proxy class per extension"""
+    proxy = (
+        "\n\n"
+        "class {ext_class}(LazyExtension):\n"
+        '    """Activate the ``{ext}`` extension"""\n'
+        "\n"
+        '    target = "{namespace}.{package}.{ext}:{ext_class}"\n'
+    )
+    proxies = (
+        proxy.format(ext=name, ext_class=class_name(name), **opts)
+        for name in opts["extension_names"]
+    )
+    values = {**opts, "extension_proxies": "".join(proxies)}
+    return template("lazy_extension").safe_substitute(values)
 
 
 def modify_setupcfg(definition: Leaf, opts: ScaffoldOpts) -> ResolvedLeaf:
@@ -172,12 +286,60 @@ def modify_setupcfg(definition: Leaf, opts: ScaffoldOpts) -> ResolvedLeaf:
     setupcfg = ConfigUpdater()
     setupcfg.read_string(reify_content(contents, opts))
 
-    modifiers = (add_pytest_requirements, add_entry_point)
+    modifiers = (
+        add_pytest_requirements,
+        add_pytest_config,
+        add_entry_point,
+        add_extension_names,
+    )
     new_setupcfg = reduce(lambda acc, fn: fn(acc, opts), modifiers, setupcfg)
 
     return str(new_setupcfg), original_op
 
 
+def add_system_tests_ci(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
+    """Add tasks for the slow/system tests to the Cirrus CI config (registered
+    after all the actions adding files, so the config generated by the Cirrus
+    extension is already in the structure). See :obj:`pyscaffold.actions.Action`
+    """
+    if struct.get(".cirrus.yml") is None:
+        return struct, opts
+
+    files: Structure = {".cirrus.yml": modify_cirrus(struct[".cirrus.yml"], opts)}
+    return shared_merge(struct, files), opts
+
+
+def modify_cirrus(definition: Leaf, opts: ScaffoldOpts) -> ResolvedLeaf:
+    """Key the dependency caches of the Cirrus CI tasks generated by PyScaffold on
+    ``setup.cfg``/``tox.ini`` and append the task running the slow/system tests.
+    See :obj:`pyscaffold.operations`.
+    """
+    contents, original_op = resolve_leaf(definition)
+    cirrus = (reify_content(contents, opts) or "").rstrip("\n") + "\n"
+    cirrus = CIRRUS_PIP_CACHE.sub(add_cirrus_caches, cirrus)
+    return cirrus + template("cirrus_system_tests").template, original_op
+
+
+def add_cirrus_caches(match: re.Match) -> str:
+    """Add ``setup.cfg`` to the fingerprint of a ``pip_cache`` block and a ``.tox``
+    cache next to it (with the same fingerprint prefix, e.g. OS and task name)
+    """
+    indent, fingerprint = match["indent"], match["fingerprint"]
+    if "setup.cfg" in fingerprint:
+        return match[0]
+
+    prefix = fingerprint.split("|")[0].strip()
+    inner = indent + " " * 2
+    return (
+        f"{indent}pip_cache:\n{match['body']}"
+        f"{inner}fingerprint_script: {prefix} | cat - setup.cfg\n{match['tail']}"
+        f"{indent}tox_cache:\n"
+        f"{inner}folder: .tox\n"
+        f"{inner}fingerprint_script: {prefix} | cat - setup.cfg tox.ini\n"
+        f"{inner}reupload_on_changes: true\n"
+    )
+
+
 def add_entry_point(setupcfg: ConfigUpdater, opts: ScaffoldOpts) -> ConfigUpdater:
     """Adds the extension's entry_point to setup.cfg"""
     entry_points_key = "options.entry_points"
@@ -187,13 +349,48 @@ def add_entry_point(setupcfg: ConfigUpdater, opts: ScaffoldOpts) -> ConfigUpdate
 
     entry_points = setupcfg[entry_points_key]
     entry_points.insert_at(0).option("pyscaffold.cli")
-    template = "{package} = {namespace}.{package}.{file_name}:{extension_class_name}"
-    value = template.format(file_name=EXTENSION_FILE_NAME, **opts)
-    entry_points["pyscaffold.cli"].set_values([value])
+    template = "{ext} = {namespace}.{package}.{file_name}:{ext_class}"
+    extension_names = opts.get("extension_names") or [opts["package"]]
+    file_name = DISPATCHER_FILE_NAME if is_lazy(opts) else EXTENSION_FILE_NAME
+    # ^  each lazy extension has its own proxy class with the same name
+    values = [
+        template.format(ext=n, file_name=file_name, ext_class=class_name(n), **opts)
+        for n in extension_names
+    ]
+    entry_points["pyscaffold.cli"].set_values(values)
 
     return setupcfg
 
 
+def add_extension_names(setupcfg: ConfigUpdater, opts: ScaffoldOpts) -> ConfigUpdater:
+    """Persist the names of the lazy extensions in the ``[pyscaffold]`` section, so
+    ``putup --update`` keeps generating the same modules
+    """
+    if not is_lazy(opts) or not setupcfg.has_section("pyscaffold"):
+        return setupcfg
+
+    setupcfg["pyscaffold"].set("extension_names")
+    setupcfg["pyscaffold"]["extension_names"].set_values(opts["extension_names"])
+    return setupcfg
+
+
+def existing_extension_names(opts: ScaffoldOpts) -> List[str]:
+    """Names of the extensions registered in the ``pyscaffold.cli`` entry points of
+    an existing project being updated (empty for new projects)
+    """
+    if not opts.get("update"):
+        return []
+
+    try:
+        setupcfg = read_setupcfg(opts["project_path"])
+        entry_points = setupcfg.get("options.entry_points", "pyscaffold.cli").value
+    except (FileNotFoundError, ConfigError):
+        return []
+
+    lines = (line.partition("=") for line in (entry_points or "").splitlines())
+    return [name.strip() for name, _, _ in lines if name.strip()]
+
+
 def add_pytest_requirements(setupcfg: ConfigUpdater, _opts) -> ConfigUpdater:
     """Add [options.extras_require] testing requirements for py.test"""
     extras_require = setupcfg["options.extras_require"]
@@ -201,6 +398,33 @@ def add_pytest_requirements(setupcfg: ConfigUpdater, _opts) -> ConfigUpdater:
     return setupcfg
 
 
+def add_pytest_config(setupcfg: ConfigUpdater, _opts) -> ConfigUpdater:
+    """Add the ``slow``/``system`` markers to [tool:pytest] and make a plain
+    ``pytest`` run only the remaining (fast) tests, in parallel with pytest-xdist
+    """
+    pytest_section = setupcfg["tool:pytest"]
+
+    addopts = pytest_section["addopts"]
+    current = [v.strip() for v in (addopts.value or "").splitlines() if v.strip()]
+    addopts.set_values([*current, *(v for v in PYTEST_OPTIONS if v not in current)])
+
+    if "markers" not in pytest_section:
+        # Replace the commented example generated by PyScaffold (if existing)
+        example = next(
+            (b for b in pytest_section.structure if "# markers =" in str(b)), None
+        )
+        anchor = example or pytest_section["addopts"]
+        anchor.add_after.option("markers")
+        if example:
+            example.add_before.comment("Use pytest markers to select specific tests")
+            # ConfigUpdater 2 uses ``remove``, while 3 uses ``detach``
+            remove = getattr(example, "detach", None) or example.remove
+            remove()
+    pytest_section["markers"].set_values(PYTEST_MARKERS)
+
+    return setupcfg
+
+
 def add_doc_requirements(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
     """In order to build the docs new requirements are necessary now.
 
@@ -229,7 +453,42 @@ def add_doc_requirements(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
 
     files: Structure = {"docs": {"requirements.txt": (new_contents, file_op)}}
 
-    return merge(struct, files), opts
+    return shared_merge(struct, files), opts
+
+
+def shared_merge(old: Structure, new: Structure) -> Structure:
+    """Copy-on-write version of :obj:`pyscaffold.structure.merge`.
+
+    Instead of deep copying the entire ``old`` structure, only the directories along
+    the paths defined in ``new`` are (shallow) copied. All the other nodes are shared
+    between ``old`` and the returned structure, therefore none of them should be
+    modified in place (PyScaffold's structure manipulation functions never do so).
+    """
+    merged = dict(old)
+    for key, value in new.items():
+        old_value = old.get(key)
+        new_is_dict, old_is_dict = isinstance(value, dict), isinstance(old_value, dict)
+        if new_is_dict and old_is_dict:
+            merged[key] = shared_merge(cast(dict, old_value), cast(dict, value))
+        elif old_value is None or new_is_dict or old_is_dict:
+            merged[key] = value
+        else:
+            merged[key] = merge_leaf(cast(Leaf, old_value), cast(Leaf, value))
+    return merged
+
+
+def merge_leaf(old_value: Leaf, new_value: Leaf) -> Leaf:
+    """Merge two leaves, with the same semantics used by
+    :obj:`pyscaffold.structure.merge` (``None`` content/file operation in
+    ``new_value`` means the ones in ``old_value`` are kept).
+    """
+    old = old_value if isinstance(old_value, (list, tuple)) else (old_value, None)
+    new = new_value if isinstance(new_value, (list, tuple)) else (new_value, None)
+
+    content = old[0] if new[0] is None else new[0]
+    file_op = old[1] if new[1] is None else new[1]
+
+    return content if file_op is None else (content, file_op)
 
 
 def get_requirements() -> List[str]:
@@ -247,3 +506,15 @@ def get_requirements() -> List[str]:
 
 def is_commented(line):
     return line.strip().startswith("#")
+
+
+def class_name(extension_name: str) -> str:
+    """CamelCase version of the extension name (as in the ``pyscaffold.cli`` entry
+    point name), see :obj:`pyscaffold.extensions.Extension`.
+    """
+    return "".join(map(str.capitalize, extension_name.split("_")))
+
+
+def is_lazy(opts: ScaffoldOpts) -> bool:
+    """Multiple extensions in the same package are loaded via a lazy dispatcher"""
+    return len(opts.get("extension_names", ())) > 1
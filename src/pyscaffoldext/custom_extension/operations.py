@@ -0,0 +1,74 @@
+"""File operations for large generated assets.
+
+PyScaffold's default :obj:`~pyscaffold.operations.create` file operation expects the
+whole file contents as a string inside the project structure. For big fixtures or
+binary files that means the entire file is held in memory until PyScaffold writes it.
+
+:obj:`stream` creates a :obj:`~pyscaffold.operations.FileOp` that ignores the
+contents given in the structure and instead copies a file from disk (via
+:obj:`shutil.copyfile`, which uses efficient platform-specific syscalls when available)
+or writes the chunks produced by a callable, one at a time. Nothing is read or
+produced when PyScaffold runs with ``--pretend``. Example::
+
+    from pyscaffold.operations import no_overwrite
+
+    files: Structure = {
+        "tests": {"fixtures": {"big.db": ("", no_overwrite(stream(big_db_path)))}},
+    }
+
+Note:
+    The contents in the leaf are just a placeholder and are not written to disk, but
+    they should not be :obj:`None` (otherwise they are discarded by
+    :obj:`pyscaffold.structure.merge`). An empty string is the natural choice.
+"""
+import shutil
+from pathlib import Path
+from typing import Callable, Iterable, Union
+
+from pyscaffold import file_system as fs
+from pyscaffold.log import logger
+from pyscaffold.operations import FileContents, FileOp, ScaffoldOpts
+
+Chunk = Union[str, bytes]
+ChunkProducer = Callable[[ScaffoldOpts], Iterable[Chunk]]
+"""Function called with PyScaffold's ``opts`` producing file contents in chunks"""
+
+Source = Union[fs.PathLike, ChunkProducer]
+"""Either a path to a file to be copied or a :obj:`ChunkProducer`"""
+
+ENCODING = "utf-8"
+
+
+def stream(source: Source) -> FileOp:
+    """File op factory. Returns a :obj:`~pyscaffold.operations.FileOp` that streams
+    ``source`` straight into the file (without ever loading it entirely in memory).
+
+    Args:
+        source: path to a file that will be copied, or a function that receives
+            PyScaffold's ``opts`` and returns an iterable of chunks (:obj:`str` chunks
+            are encoded with UTF-8, :obj:`bytes` are written as they are).
+    """
+
+    def _stream(path: Path, _contents: FileContents, opts: ScaffoldOpts):
+        """See ``pyscaffoldext.custom_extension.operations.stream``"""
+        pretend = opts.get("pretend")
+        if not path.parent.is_dir():
+            fs.create_directory(path.parent, pretend=pretend)
+
+        if not pretend:
+            if callable(source):
+                write_chunks(path, source(opts))
+            else:
+                shutil.copyfile(source, path)
+
+        logger.report("create", path)
+        return path
+
+    return _stream
+
+
+def write_chunks(path: Path, chunks: Iterable[Chunk]):
+    """Write each one of the chunks into the file as soon as it is produced"""
+    with open(path, "wb") as file:
+        for chunk in chunks:
+            file.write(chunk.encode(ENCODING) if isinstance(chunk, str) else chunk)
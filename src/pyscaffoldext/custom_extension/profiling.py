@@ -0,0 +1,107 @@
+"""Opt-in memory profiling for the actions registered by :obj:`CustomExtension`.
+
+When the ``--profile-memory REPORT`` option is given, each action runs under
+:mod:`tracemalloc` and one JSON record per action is appended to ``REPORT``
+(`JSON Lines`_ format), so reports from different runs can be easily compared.
+Each record contains the action name, duration, net and peak traced memory (bytes)
+and the top allocation sites (``file:line``) still alive when the action finishes.
+The peak is ``null`` when :mod:`tracemalloc` was already tracing before the action on
+Python < 3.9 (it cannot be reset there, so it might not belong to the action).
+
+.. _JSON Lines: https://jsonlines.org
+"""
+import contextlib
+import json
+import os
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator
+
+from pyscaffold.actions import Action, ActionParams, ScaffoldOpts, Structure
+from pyscaffold.update import pyscaffold_version
+
+TOP_SITES = 10
+"""Number of allocation sites included in each record"""
+
+TRACEBACK_FRAMES = 1
+"""Number of frames stored by :mod:`tracemalloc` for each allocation"""
+
+IGNORE = tuple(
+    tracemalloc.Filter(False, path)
+    for path in (tracemalloc.__file__, contextlib.__file__, __file__)
+)
+"""Allocations made by the profiler itself"""
+
+
+def profiled(action: Action) -> Action:
+    """Decorate a PyScaffold action to run it under :obj:`memory_profile`"""
+
+    @wraps(action)
+    def _profiled(struct: Structure, opts: ScaffoldOpts) -> ActionParams:
+        with memory_profile(action.__name__, opts):
+            return action(struct, opts)
+
+    return _profiled
+
+
+@contextmanager
+def memory_profile(name: str, opts: ScaffoldOpts) -> Iterator[None]:
+    """Trace memory allocations in the block and append the results to the report
+    file given by the ``profile_memory`` option (does nothing if not given).
+    """
+    report = opts.get("profile_memory")
+    if not report:
+        yield
+        return
+
+    was_tracing = tracemalloc.is_tracing()
+    peak_known = True
+    if was_tracing:
+        before = tracemalloc.take_snapshot().filter_traces(IGNORE)
+        peak_known = hasattr(tracemalloc, "reset_peak")  # Python >= 3.9
+        if peak_known:
+            tracemalloc.reset_peak()
+    else:
+        tracemalloc.start(TRACEBACK_FRAMES)
+
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        duration = perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(IGNORE)
+        if was_tracing:
+            stats = snapshot.compare_to(before, "lineno")
+        else:
+            tracemalloc.stop()
+            stats = snapshot.statistics("lineno")
+
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "pid": os.getpid(),
+            "pyscaffold": pyscaffold_version,
+            "project": str(opts.get("project_path", "")),
+            "action": name,
+            "duration": duration,
+            "net_bytes": current - baseline,
+            "peak_bytes": peak - baseline if peak_known else None,
+            # ^  without ``reset_peak`` the peak could be from before the action
+            "top": [allocation_site(stat) for stat in stats[:TOP_SITES]],
+        }
+        with open(Path(report), "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+
+
+def allocation_site(stat: tracemalloc.Statistic) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "bytes": getattr(stat, "size_diff", stat.size),
+        "count": getattr(stat, "count_diff", stat.count),
+    }
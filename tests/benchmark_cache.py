@@ -0,0 +1,74 @@
+"""Compare the generation of a project with the custom extension without the
+``--generation-cache``, with an empty (cold) cache and with the project already in
+the (warm) cache.
+Example::
+
+    python -m tests.benchmark_cache -n 10
+
+For each case, the mean duration of :obj:`pyscaffold.api.create_project` is reported
+(each run creates a new project in a temporary directory, without ``git init``).
+"""
+import argparse
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from timeit import default_timer
+from typing import List, Optional
+
+from pyscaffold import api
+from pyscaffold.extensions import Extension
+
+from pyscaffoldext.custom_extension.extension import CustomExtension
+
+
+class NoGit(Extension):
+    """Do not initialize a git repository (not affected by the cache)"""
+
+    def activate(self, actions):
+        return self.unregister(actions, "pyscaffold.actions:init_git")
+
+
+def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--number", type=int, default=10)
+    return parser.parse_args(args)
+
+
+def generate(root: Path, cache: Optional[Path]) -> float:
+    """Duration (s) of the generation of a new project under ``root``"""
+    opts = dict(
+        project_path=root / "pyscaffoldext-some_extension",
+        package="some_extension",
+        author="Benchmark",
+        email="benchmark@example.com",
+        extensions=[CustomExtension(), NoGit()],
+        config_files=api.NO_CONFIG,
+        generation_cache=cache and str(cache),
+    )
+    start = default_timer()
+    api.create_project(**opts)
+    return default_timer() - start
+
+
+def measure(number: int, cache: str) -> float:
+    """Mean duration (ms) of ``number`` generations, with the given ``cache`` mode"""
+    total = 0.0
+    for _ in range(number):
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            cache_dir = None if cache == "none" else root / "cache"
+            if cache == "warm":
+                generate(root / "warmup", cache_dir)
+            total += generate(root, cache_dir)
+    return total / number * 1000
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    opts = parse_args(args)
+    for cache in ("none", "cold", "warm"):
+        print(f"{cache:<6}{measure(opts.number, cache):>10.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Compare :obj:`pyscaffold.structure.merge` and
+:obj:`~pyscaffoldext.custom_extension.extension.shared_merge` when adding a single
+file to a large project structure (``--dirs`` x ``--files`` template leaves).
+Example::
+
+    python -m tests.benchmark_merge --dirs 100 --files 50
+
+For each function, the mean duration per call and the peak memory traced by
+:mod:`tracemalloc` during a single call are reported.
+"""
+import argparse
+import sys
+import tracemalloc
+from string import Template
+from timeit import Timer
+from typing import Callable, List, Optional
+
+from pyscaffold.operations import no_overwrite
+from pyscaffold.structure import Structure, merge
+
+from pyscaffoldext.custom_extension.extension import shared_merge
+
+Merge = Callable[[Structure, Structure], Structure]
+NO_OVERWRITE = no_overwrite()
+
+
+def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dirs", type=int, default=100)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("-n", "--number", type=int, default=20)
+    return parser.parse_args(args)
+
+
+def example_structure(dirs: int, files: int) -> Structure:
+    """Project structure with ``dirs`` directories of ``files`` template leaves"""
+    template = Template("# ${name}\n" + "x = 1\n" * 20)
+    return {
+        f"dir{i}": {f"file{j}.py": (template, NO_OVERWRITE) for j in range(files)}
+        for i in range(dirs)
+    }
+
+
+def measure(fn: Merge, old: Structure, new: Structure, number: int) -> dict:
+    """Mean duration (ms) and peak traced memory (KiB) of ``fn(old, new)``"""
+    duration = Timer(lambda: fn(old, new)).timeit(number) / number
+    tracemalloc.start()
+    try:
+        fn(old, new)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time_ms": duration * 1000, "peak_kib": peak / 1024}
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    opts = parse_args(args)
+    old = example_structure(opts.dirs, opts.files)
+    new: Structure = {"dir0": {"new_file.py": ("", NO_OVERWRITE)}}
+    for fn in (merge, shared_merge):
+        result = measure(fn, old, new, opts.number)
+        time_ms, peak_kib = result["time_ms"], result["peak_kib"]
+        print(f"{fn.__name__:<13}{time_ms:>10.3f} ms{peak_kib:>12.1f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
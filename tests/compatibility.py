@@ -0,0 +1,163 @@
+"""Run the tests of a generated extension against several PyScaffold versions.
+
+``get_requirements`` pins the generated extensions to ``pyscaffold>=X.Y,<next major``,
+so they are expected to work with any PyScaffold version in that range.
+This runner creates (in parallel) one virtual environment per PyScaffold version,
+installs this package and the given PyScaffold version, generates a sample extension
+and runs its (fast) tests. Example::
+
+    python -m tests.compatibility 4.0.1 4.3 4.6 --jobs 3
+
+A wheel for this package is built once (before starting the parallel jobs). The virtual
+environments are cached in ``--cache-dir`` and reused in the next runs (only the wheel
+and the generated project are re-installed).
+The logs for each version are stored next to the environments.
+"""
+import argparse
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from shutil import copytree, ignore_patterns, rmtree
+from subprocess import STDOUT, CalledProcessError, check_output
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import List, NamedTuple, Optional
+
+from pyscaffold.shell import get_executable
+
+from .helpers import PYTHON
+
+ROOT = Path(__file__).parent.parent
+SAMPLE = "pyscaffoldext-sample"
+TEST_REQUIREMENTS = ("pytest", "configupdater")
+PYTEST_ARGS = ("-m", "not slow and not system", "-o", "addopts=")
+# ^  addopts from the generated setup.cfg require pytest-cov, not needed here
+BUILD_IGNORE = (".compat", ".tox", ".venv", "build", "dist", "*.egg-info", ".coverage")
+"""Not needed to build the wheel (``.compat`` is the default ``--cache-dir``)"""
+
+
+class Result(NamedTuple):
+    version: str
+    passed: bool
+    setup_time: float
+    test_time: float
+    log: Path
+
+
+def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("versions", nargs="+", metavar="VERSION")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-dir", type=Path, default=ROOT / ".compat")
+    return parser.parse_args(args)
+
+
+def run_logged(log, *args, **kwargs):
+    """Run the external command, appending its output to the ``log`` file"""
+    with open(log, "a", encoding="utf-8") as file:
+        file.write(f"\n$ {' '.join(map(str, args))}\n")
+        try:
+            opts = dict(stderr=STDOUT, universal_newlines=True, encoding="utf-8")
+            output = check_output(args, **opts, **kwargs)
+        except CalledProcessError as ex:
+            file.write(ex.output or "")
+            raise
+        file.write(output)
+        return output
+
+
+def build_wheel(cache_dir: Path) -> Path:
+    """Build a wheel for this package, once for all the jobs.
+    pip builds local directories in place (``build``, ``*.egg-info``), so the wheel is
+    built from a copy of ``ROOT`` inside ``cache_dir`` (``.git`` is kept for
+    setuptools-scm), leaving the source tree untouched.
+    """
+    wheel_dir, source = cache_dir / "wheels", cache_dir / "source"
+    for path in (wheel_dir, source):
+        rmtree(path, ignore_errors=True)
+    copytree(ROOT, source, ignore=ignore_patterns(*BUILD_IGNORE), symlinks=True)
+    log = cache_dir / "build.log"
+    log.write_text("", encoding="utf-8")
+    wheel = ("-m", "pip", "wheel", "--no-deps", "--wheel-dir", wheel_dir, source)
+    run_logged(log, PYTHON, *wheel)
+    return next(wheel_dir.glob("*.whl"))
+
+
+def prepare_env(version: str, wheel: Path, cache_dir: Path, log: Path) -> Path:
+    """Create (or reuse) the virtual environment for the given PyScaffold version"""
+    env = cache_dir / f"pyscaffold-{version}"
+    ready = env / ".ready"
+    if not ready.exists():
+        run_logged(log, PYTHON, "-m", "venv", "--clear", env)
+        python = get_executable("python", prefix=env, include_path=False)
+        pip = (python, "-m", "pip", "install", "--upgrade")
+        run_logged(log, *pip, "pip", f"pyscaffold=={version}", *TEST_REQUIREMENTS)
+        ready.touch()
+
+    python = get_executable("python", prefix=env, include_path=False)
+    reinstall = ("-m", "pip", "install", "--no-deps", "--force-reinstall")
+    run_logged(log, python, *reinstall, wheel)
+    return env
+
+
+def check_version(version: str, wheel: Path, cache_dir: Path) -> Result:
+    log = cache_dir / f"pyscaffold-{version}.log"
+    log.write_text("", encoding="utf-8")
+    start = perf_counter()
+    setup_time = 0.0
+    try:
+        env = prepare_env(version, wheel, cache_dir, log)
+        python = get_executable("python", prefix=env, include_path=False)
+        putup = get_executable("putup", prefix=env, include_path=False)
+        with TemporaryDirectory() as workspace:
+            args = ("--no-config", "--custom-extension", SAMPLE)
+            run_logged(log, putup, *args, cwd=workspace)
+            project = Path(workspace, SAMPLE)
+            run_logged(log, python, "-m", "pip", "install", "--no-deps", "-e", project)
+            setup_time = perf_counter() - start
+            run_logged(log, python, "-m", "pytest", *PYTEST_ARGS, cwd=project)
+        passed = True
+    except CalledProcessError:
+        passed = False  # the output is already in the log
+    except Exception:  # e.g. missing executables, the other versions still run
+        with open(log, "a", encoding="utf-8") as file:
+            file.write(traceback.format_exc())
+        passed = False
+
+    setup_time = setup_time or perf_counter() - start
+    test_time = perf_counter() - start - setup_time
+    return Result(version, passed, setup_time, test_time, log)
+
+
+def summary(results: List[Result]) -> str:
+    """Table with pass/fail and timings for each PyScaffold version"""
+    header = ("PyScaffold", "Result", "Setup (s)", "Tests (s)", "Log")
+    rows = [header]
+    for r in results:
+        result = "pass" if r.passed else "FAIL"
+        timings = (f"{r.setup_time:.1f}", f"{r.test_time:.1f}")
+        rows.append((r.version, result, *timings, str(r.log)))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    lines = ["  ".join(map(str.ljust, row, widths)).rstrip() for row in rows]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    opts = parse_args(args)
+    cache_dir = opts.cache_dir
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    wheel = build_wheel(cache_dir)
+    with ThreadPoolExecutor(max_workers=opts.jobs) as executor:
+        args = (wheel, cache_dir)
+        jobs = [executor.submit(check_version, v, *args) for v in opts.versions]
+        results = [job.result() for job in jobs]
+
+    print(summary(results))
+    return 0 if all(r.passed for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,52 +4,203 @@ Functions that can be imported and re-used are more suitable for the ``helpers``
 """
 import logging
 import os
+import threading
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+from tempfile import mkdtemp
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Tuple
 
 import pytest
-from pyscaffold.log import ReportFormatter
+from pyscaffold.log import ReportFormatter, logger
 
-from .helpers import rmpath, uniqstr
+from pyscaffoldext.custom_extension.extension import template
+
+from .helpers import ram_dir, rmpath, uniqstr
+
+pytest_plugins = ["pytester"]
+
+TMPFOLDER_TIMINGS: List[Tuple[str, float]] = []
+"""Workspace kind (``ram`` or ``disk``) and duration of the tests using ``tmpfolder``.
+Collected from the test reports, so it also includes the tests run by ``pytest-xdist``
+workers.
+"""
+
+TMPFOLDER_CACHE_KEY = "tmpfolder/durations"
+"""Key for the timings of the previous runs in pytest's cache (one entry per kind)"""
 
 
 @pytest.fixture
-def tmpfolder(tmp_path):
+def tmpfolder(request, tmp_path):
+    """Temporary workspace (also the current working directory during the test).
+    Set ``TMPFOLDER_RAM`` to place it in a RAM-backed directory (see ``ram_dir``).
+    """
     old_path = os.getcwd()
-    new_path = tmp_path / uniqstr()
+    ram = ram_dir()
+    root = Path(mkdtemp(dir=str(ram))) if ram else tmp_path
+    new_path = root / uniqstr()
     new_path.mkdir(parents=True, exist_ok=True)
     os.chdir(str(new_path))
+    start = perf_counter()
     try:
         yield new_path
     finally:
+        timing = ("ram" if ram else "disk", perf_counter() - start)
+        request.node.user_properties.append(("tmpfolder", timing))
         os.chdir(old_path)
-        rmpath(new_path)
+        rmpath(root if ram else new_path)
+
+
+@pytest.fixture
+def generated_conftest(pytester):
+    """Factory creating a ``pkg`` test package in :obj:`pytester`'s directory, with the
+    given ``tests`` module and the ``conftest.py``/``helpers.py`` files either from this
+    repository (``source="repo"``) or from the generated projects (``"template"``).
+    Run the tests with ``pytester.runpytest("pkg")``.
+    """
+
+    def _generated_conftest(tests: str, source: str = "repo"):
+        pkg = pytester.mkpydir("pkg")
+        for name in ("conftest", "helpers"):
+            if source == "template":
+                contents = template(name).template  # no placeholders in these files
+            else:
+                contents = Path(__file__).with_name(f"{name}.py").read_text()
+            (pkg / f"{name}.py").write_text(contents)
+        (pkg / "test_pkg.py").write_text(tests)
+        return pytester
+
+    return _generated_conftest
+
+
+def pytest_runtest_logreport(report):
+    if report.when == "teardown":
+        timings = (v for k, v in report.user_properties if k == "tmpfolder")
+        TMPFOLDER_TIMINGS.extend((kind, duration) for kind, duration in timings)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Report how long the tests using ``tmpfolder`` took, next to the last run using
+    the other kind of workspace (RAM-backed or disk), so they can be compared.
+    Only when RAM-backed workspaces are used (in this run or in a previous one).
+    """
+    if not TMPFOLDER_TIMINGS or hasattr(config, "workerinput"):
+        return  # nothing to report (or inside a pytest-xdist worker)
+
+    cache = getattr(config, "cache", None)  # None with ``-p no:cacheprovider``
+    totals = cache.get(TMPFOLDER_CACHE_KEY, {}) if cache else {}
+    if "ram" not in totals and all(kind != "ram" for kind, _ in TMPFOLDER_TIMINGS):
+        return  # TMPFOLDER_RAM was never used, nothing to compare
+
+    terminalreporter.section("tmpfolder workspaces")
+    for kind in ("ram", "disk"):
+        durations = [duration for k, duration in TMPFOLDER_TIMINGS if k == kind]
+        if durations:
+            totals[kind] = [len(durations), sum(durations)]
+            run = "this run"
+        elif kind in totals:
+            run = "previous run"
+        else:
+            continue
+        tests, total = totals[kind]
+        mean = total / tests * 1000
+        msg = f"{kind}: {tests} tests, {total:.2f}s (mean {mean:.1f}ms, {run})"
+        terminalreporter.write_line(msg)
+
+    if cache:
+        cache.set(TMPFOLDER_CACHE_KEY, totals)
+
+
+class ThreadBuffers(logging.Handler):
+    """Log handler writing each record into the buffer registered for the current
+    thread (see ``captured_logs``). Records from threads without a buffer (e.g. started
+    inside a test) are written into all the registered buffers.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.buffers: Dict[int, StringIO] = {}
+
+    def emit(self, record):
+        msg = self.format(record) + "\n"
+        own = self.buffers.get(threading.get_ident())
+        for buffer in [own] if own else list(self.buffers.values()):
+            buffer.write(msg)
+
+
+POOLED_LOGGER = logging.getLogger(f"{__name__}.isolated")
+POOLED_HANDLER = ThreadBuffers()
+POOL_LOCK = threading.Lock()
+ORIGINAL_LOGGER: Dict[str, Any] = {}
+"""Attributes of PyScaffold's logger replaced while the pooled logger is in use"""
 
 
 @pytest.fixture(autouse=True)
-def isolated_logger(request, monkeypatch):
+def isolated_logger(request):
     """See isolated_logger in pyscaffold/tests/conftest.py to see why this fixture
     is important to guarantee tests checking logs work as expected.
-    This just work for multiprocess environments, not multithread.
+
+    Instead of creating a brand new logger for each test (which would never be removed
+    from :obj:`logging.Logger.manager`), the same pooled logger is reused.
+    The fixture value is an in-memory buffer capturing PyScaffold's log messages, one
+    per thread, so tests running concurrently in different threads are also isolated.
     """
     if "original_logger" in request.keywords:
-        yield
+        yield None
         return
 
-    # Get a fresh new logger, not used anywhere
-    raw_logger = logging.getLogger(uniqstr())
-    raw_logger.setLevel(logging.NOTSET)
-    new_handler = logging.StreamHandler()
+    with captured_logs() as buffer:
+        yield buffer
+
+
+@contextmanager
+def captured_logs() -> Iterator[StringIO]:
+    """Capture PyScaffold's log messages emitted by the current thread.
+    The pooled logger replaces the internals of PyScaffold's (global) logger while at
+    least one thread is capturing messages, and is reset afterwards.
+    """
+    buffer, thread = StringIO(), threading.get_ident()
+    with POOL_LOCK:
+        if not POOLED_HANDLER.buffers:
+            install_pooled_logger()
+        POOLED_HANDLER.buffers[thread] = buffer
+    try:
+        yield buffer
+    finally:
+        with POOL_LOCK:
+            del POOLED_HANDLER.buffers[thread]
+            if not POOLED_HANDLER.buffers:
+                uninstall_pooled_logger()
 
+
+def install_pooled_logger():
+    reset_logger(POOLED_LOGGER)
     patches = {
         "propagate": True,  # <- needed for caplog
         "nesting": 0,
-        "wrapped": raw_logger,
-        "handler": new_handler,
+        "wrapped": POOLED_LOGGER,
+        "handler": POOLED_HANDLER,
         "formatter": ReportFormatter(),
     }
     for key, value in patches.items():
-        monkeypatch.setattr(f"pyscaffold.log.logger.{key}", value)
+        ORIGINAL_LOGGER[key] = getattr(logger, key)
+        setattr(logger, key, value)
 
-    try:
-        yield
-    finally:
-        new_handler.close()
+
+def uninstall_pooled_logger():
+    for key, value in reversed(list(ORIGINAL_LOGGER.items())):
+        setattr(logger, key, value)
+    ORIGINAL_LOGGER.clear()
+    reset_logger(POOLED_LOGGER)
+
+
+def reset_logger(raw_logger: logging.Logger):
+    """Bring a pooled logger back to its pristine state"""
+    for handler in raw_logger.handlers[:]:
+        raw_logger.removeHandler(handler)
+    for log_filter in raw_logger.filters[:]:
+        raw_logger.removeFilter(log_filter)
+    raw_logger.setLevel(logging.NOTSET)
+    raw_logger.propagate = True
+    raw_logger.disabled = False
@@ -1,16 +1,22 @@
 # TODO: Try always to keep this file in sync with the helpers.template
+import json
 import os
+import re
 import shlex
 import stat
 import sys
 import traceback
+from datetime import date
+from functools import lru_cache
+from hashlib import sha256
 from pathlib import Path
-from shutil import rmtree
+from shutil import disk_usage, rmtree
 from subprocess import STDOUT, CalledProcessError, check_output
 from time import sleep
 from uuid import uuid4
 from warnings import warn
 
+from pyscaffold import __version__ as pyscaffold_version
 from pyscaffold.shell import get_executable
 
 IS_POSIX = os.name == "posix"
@@ -20,12 +26,52 @@ PYTHON = sys.executable
 inside tox folder. If we install packages by mistake is not a huge problem.
 """
 
+RAM_DIR = "/dev/shm"
+"""Default RAM-backed directory used when ``TMPFOLDER_RAM`` is set to ``1``"""
+
+RAM_MIN_FREE = 2 * 1024**3
+"""Minimum free space (bytes) in the RAM-backed directory before falling back to disk"""
+
+SNAPSHOT_IGNORE = {".git", ".venv", ".tox", ".eggs", "__pycache__", "build", "dist"}
+"""Directories never included in the manifest of a generated project"""
+
+SNAPSHOT_NORMALIZE = (
+    (rf"\b{re.escape(pyscaffold_version)}\b", "<PYSCAFFOLD_VERSION>"),
+    (r"\b\d{4}-\d{2}-\d{2}\b", "<DATE>"),
+    (rf"\b{date.today().year}\b", "<YEAR>"),
+)
+"""Pairs of ``(regex, replacement)`` applied to text files before hashing"""
+
 
 def uniqstr():
     """Generates a unique random long string every time it is called"""
     return str(uuid4())
 
 
+@lru_cache(maxsize=None)
+def ram_dir():
+    """Directory for RAM-backed workspaces, requested with the ``TMPFOLDER_RAM``
+    environment variable (``1`` for ``/dev/shm`` or the path of any other tmpfs).
+    :obj:`None` is returned if not requested, not available or without enough space.
+    """
+    value = os.getenv("TMPFOLDER_RAM", "").strip()
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+
+    path = Path(RAM_DIR if value.lower() in ("1", "true", "yes") else value)
+    try:
+        free = disk_usage(str(path)).free
+    except OSError:
+        warn(f"TMPFOLDER_RAM: {path} is not available, using the disk instead")
+        return None
+
+    if free < RAM_MIN_FREE:
+        warn(f"TMPFOLDER_RAM: not enough space in {path}, using the disk instead")
+        return None
+
+    return path
+
+
 def rmpath(path):
     """Carelessly/recursively remove path.
     If an error occurs it will just be ignored, so not suitable for every usage.
@@ -108,3 +154,67 @@ def run_common_tasks(tests=True, docs=True, pre_commit=True, install=True):
         venv_pip = get_executable("pip", prefix=".venv", include_path=False)
         assert venv_pip, "Pip not found, make sure you have used the --venv option"
         run(venv_pip, "install", wheels[0])
+
+
+def manifest(root, patterns=("**/*",), replacements=(), views=None):
+    """Content-hash manifest (``{relative POSIX path: sha256}``) of the files under
+    ``root`` matching any of the glob ``patterns``.
+    Text files are normalized with :obj:`SNAPSHOT_NORMALIZE` and the extra
+    ``(regex, replacement)`` pairs in ``replacements`` before hashing.
+    ``views`` maps relative POSIX paths to functions receiving the text of the file and
+    returning only the part that should be compared (e.g. for files that are only
+    partially generated by the code under test).
+    """
+    root = Path(root)
+    views = views or {}
+    files = {path for pattern in patterns for path in root.glob(pattern)}
+    normalize = (*SNAPSHOT_NORMALIZE, *replacements)
+    relative = {path: path.relative_to(root) for path in files}
+    return {
+        rel.as_posix(): file_hash(path, normalize, views.get(rel.as_posix()))
+        for path, rel in sorted(relative.items())
+        if path.is_file() and not SNAPSHOT_IGNORE & set(rel.parts)
+    }
+
+
+def file_hash(path, normalize=SNAPSHOT_NORMALIZE, view=None):
+    """SHA-256 of the file contents. Text files are first reduced with ``view`` (if
+    given) and then normalized with the ``(regex, replacement)`` pairs in ``normalize``
+    (line endings are always normalized). Binary files are hashed as they are.
+    """
+    content = Path(path).read_bytes()
+    try:
+        text = content.decode("utf-8").replace("\r\n", "\n")
+    except UnicodeDecodeError:
+        return sha256(content).hexdigest()
+
+    if view:
+        text = view(text)
+    for pattern, replacement in normalize:
+        text = re.sub(pattern, replacement, text)
+    return sha256(text.encode("utf-8")).hexdigest()
+
+
+def assert_manifest(root, golden, **kwargs):
+    """Compare the manifest of ``root`` (see :obj:`manifest`) with the one stored in
+    the ``golden`` JSON file, listing the added (+), removed (-) and changed (~) files.
+    The golden file is only (re-)written when the ``UPDATE_SNAPSHOTS`` environment
+    variable is set, a missing golden file is an error otherwise.
+    """
+    current = manifest(root, **kwargs)
+    golden = Path(golden)
+    if os.getenv("UPDATE_SNAPSHOTS"):
+        golden.parent.mkdir(parents=True, exist_ok=True)
+        golden.write_text(json.dumps(current, indent=2, sort_keys=True) + "\n")
+        return
+
+    assert golden.exists(), f"{golden} not found (set UPDATE_SNAPSHOTS=1 to create it)"
+    expected = json.loads(golden.read_text())
+    common = current.keys() & expected.keys()
+    diff = [
+        *(f"+ {p}" for p in sorted(current.keys() - expected.keys())),
+        *(f"- {p}" for p in sorted(expected.keys() - current.keys())),
+        *(f"~ {p}" for p in sorted(common) if current[p] != expected[p]),
+    ]
+    msg = f"Generated files differ from {golden} (set UPDATE_SNAPSHOTS=1 to accept):\n"
+    assert not diff, msg + "\n".join(diff)
@@ -0,0 +1,118 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from pyscaffold import api, cli
+from pyscaffold.extensions import Extension
+from pyscaffold.structure import merge
+
+from pyscaffoldext.custom_extension import cache as cache_module
+from pyscaffoldext.custom_extension import extension
+from pyscaffoldext.custom_extension.cache import cache_key, evict
+from pyscaffoldext.custom_extension.extension import CustomExtension
+from pyscaffoldext.custom_extension.operations import stream
+
+from .benchmark_cache import main as benchmark
+from .helpers import manifest
+
+ARGS = [
+    "--no-config",  # <- Avoid extra config from dev's machine interference
+    "--custom-extension",
+    "pyscaffoldext-some_extension",
+]
+
+
+def test_generation_cache(tmpfolder, monkeypatch):
+    cache = tmpfolder / "cache"
+    os.mkdir("first")
+    os.chdir("first")
+    cli.main([*ARGS, "--generation-cache", str(cache)])
+    entries = list(cache.glob("*.json"))
+    assert len(entries) == 1
+
+    # Tamper with the cache to make sure the second run restores from it
+    contents = json.loads(entries[0].read_text())
+    contents["CACHED.txt"] = "restored from cache"
+    entries[0].write_text(json.dumps(contents))
+
+    def fail(*_args):
+        raise AssertionError("the structure should not be built again")
+
+    # No template is rendered when the structure is found in the cache
+    monkeypatch.setattr(extension, "modify_setupcfg", fail)
+    monkeypatch.setattr(extension, "reify_leaf", fail)
+    monkeypatch.setattr(extension, "modify_cirrus", fail)
+    os.mkdir("../second")
+    os.chdir("../second")
+    cli.main([*ARGS, "--generation-cache", str(cache)])
+    project = Path("pyscaffoldext-some_extension")
+    assert (project / "CACHED.txt").read_text() == "restored from cache"
+    (project / "CACHED.txt").unlink()
+    assert manifest(project) == manifest(tmpfolder / "first" / project.name)
+    assert list(cache.glob("*.json")) == entries
+
+
+def test_generation_cache_key(tmpfolder):
+    cache = tmpfolder / "cache"
+    cli.main([*ARGS, "--generation-cache", str(cache)])
+    cli.main([*ARGS[:2], "pyscaffoldext-other", "--generation-cache", str(cache)])
+    assert len(list(cache.glob("*.json"))) == 2  # different inputs => different keys
+
+
+def test_generation_cache_key_extension_versions(monkeypatch):
+    opts = {"name": "pyscaffoldext-some_extension", "extensions": [CustomExtension()]}
+    versions = {"pyscaffoldext-custom-extension": "1.0"}
+    monkeypatch.setattr(cache_module, "_version", versions.get)
+    first = cache_key(opts)
+    versions["pyscaffoldext-custom-extension"] = "1.1"
+    assert cache_key(opts) != first
+
+
+class StreamedAsset(Extension):
+    """Add a file written with the ``stream`` file operation"""
+
+    def activate(self, actions):
+        return self.register(actions, add_streamed_asset)
+
+
+def add_streamed_asset(struct, opts):
+    asset = ("", stream(lambda _opts: ["x" * 1024] * 10))
+    return merge(struct, {"assets": {"big.bin": asset}}), opts
+
+
+def test_generation_cache_skips_streamed_files(tmpfolder):
+    cache = tmpfolder / "cache"
+    for project in ("first", "second"):
+        opts = dict(
+            project_path=f"pyscaffoldext-{project}",
+            package="some_extension",
+            extensions=[CustomExtension(), StreamedAsset()],
+            generation_cache=str(cache),
+            config_files=api.NO_CONFIG,
+        )
+        api.create_project(**opts)
+        asset = Path(opts["project_path"], "assets/big.bin")
+        assert asset.stat().st_size == 10 * 1024
+    assert not list(cache.glob("*.json"))  # a cached placeholder would be empty
+
+
+def test_evict(tmpfolder):
+    now = time.time()
+    for i, age in enumerate((0, 10, 20, 40)):
+        entry = Path(f"{i}.json")
+        entry.write_text("x" * 100)
+        os.utime(entry, (now - age, now - age))
+
+    removed = evict(tmpfolder, max_size=1000, max_age=30)
+    assert [p.name for p in removed] == ["3.json"]
+    removed = evict(tmpfolder, max_size=150, max_age=30)
+    assert [p.name for p in removed] == ["2.json", "1.json"]
+    assert [p.name for p in tmpfolder.glob("*.json")] == ["0.json"]
+
+
+def test_benchmark(tmpfolder, capsys):
+    assert benchmark(["--number", "1"]) == 0
+    out = capsys.readouterr().out
+    rows = [line.split() for line in out.splitlines() if line.endswith(" ms")]
+    assert [row[0] for row in rows] == ["none", "cold", "warm"]
@@ -0,0 +1,83 @@
+from pathlib import Path
+from subprocess import CalledProcessError
+
+import pytest
+
+from . import compatibility
+from .compatibility import (
+    ROOT,
+    Result,
+    build_wheel,
+    check_version,
+    main,
+    run_logged,
+    summary,
+)
+from .helpers import PYTHON
+
+
+def test_run_logged(tmpfolder):
+    log = Path("commands.log")
+    assert run_logged(log, PYTHON, "-c", "print('hello')") == "hello\n"
+    with pytest.raises(CalledProcessError):
+        run_logged(log, PYTHON, "-c", "import sys; print('oops'); sys.exit(1)")
+
+    contents = log.read_text()
+    assert contents.count("\n$ ") == 2  # both commands are logged
+    assert "hello" in contents and "oops" in contents
+
+
+def test_summary():
+    results = [
+        Result("4.0.1", True, 10.04, 2.5, Path("a.log")),
+        Result("4.6", False, 3.0, 0.0, Path("b.log")),
+    ]
+    header, separator, *rows = summary(results).splitlines()
+    assert header.split() == "PyScaffold Result Setup (s) Tests (s) Log".split()
+    assert set(separator) == {"-", " "}
+    assert rows[0].split() == ["4.0.1", "pass", "10.0", "2.5", "a.log"]
+    assert rows[1].split() == ["4.6", "FAIL", "3.0", "0.0", "b.log"]
+    assert rows[0].index("pass") == rows[1].index("FAIL")  # aligned columns
+
+
+def test_unexpected_errors_are_failures(tmpfolder, monkeypatch):
+    def _prepare_env(*_args):
+        return Path("venv-without-executables")
+
+    monkeypatch.setattr(compatibility, "prepare_env", _prepare_env)
+    monkeypatch.setattr(compatibility, "get_executable", lambda *_, **__: None)
+    result = check_version("4.6", Path("pkg.whl"), Path("."))
+    assert not result.passed
+    assert "TypeError" in result.log.read_text()  # ``None`` executable
+
+
+def test_main(tmpfolder, monkeypatch, capsys):
+    wheels = []
+
+    def _check_version(version, wheel, cache_dir):
+        wheels.append(wheel)
+        return Result(version, version != "4.0", 1.0, 1.0, cache_dir / f"{version}.log")
+
+    monkeypatch.setattr(compatibility, "build_wheel", lambda _: Path("pkg.whl"))
+    monkeypatch.setattr(compatibility, "check_version", _check_version)
+    assert main(["4.0", "4.6", "--jobs", "2", "--cache-dir", "cache"]) == 1
+    out = capsys.readouterr().out
+    assert "FAIL" in out and "pass" in out
+    assert set(wheels) == {Path("pkg.whl")}  # the same wheel is used by all the jobs
+    assert main(["4.6", "--cache-dir", "cache"]) == 0
+
+
+def test_build_wheel_outside_source_tree(tmpfolder, monkeypatch):
+    commands = []
+
+    def _run_logged(_log, *args, **_kwargs):
+        commands.append(args)
+        wheel_dir = Path(args[args.index("--wheel-dir") + 1])
+        wheel_dir.mkdir(parents=True)
+        (wheel_dir / "pkg.whl").touch()
+
+    monkeypatch.setattr(compatibility, "run_logged", _run_logged)
+    assert build_wheel(tmpfolder).name == "pkg.whl"
+    (*_, source), = commands
+    assert source != ROOT and (source / "setup.cfg").exists()
+    assert not (source / ".tox").exists() and not (source / "build").exists()
@@ -1,7 +1,18 @@
 from pathlib import Path
 
+import pytest
 from configupdater import ConfigUpdater
 from pyscaffold import cli
+from pyscaffold import extensions as ext_module
+from pyscaffold.extensions import iterate_entry_points
+from pyscaffold.shell import git
+
+try:
+    from importlib.metadata import EntryPoint
+except ImportError:  # pragma: no cover
+    from importlib_metadata import EntryPoint  # type: ignore
+
+from pyscaffoldext.custom_extension.extension import InvalidExtensionName
 
 
 def test_entry_point(tmpfolder):
@@ -15,3 +26,98 @@ def test_entry_point(tmpfolder):
     entry_point = setup_cfg.get("options.entry_points", "pyscaffold.cli").value
     expected = "\nsome_extension = pyscaffoldext.some_extension.extension:SomeExtension"
     assert entry_point == expected
+
+
+def test_multiple_entry_points(tmpfolder):
+    args = [
+        "--no-config",  # <- Avoid extra config from dev's machine interference
+        "--custom-extension",
+        "pyscaffoldext-some_extension",
+        "--extension-names",
+        "first_ext",
+        "second-ext",
+    ]
+    cli.main(args)
+
+    setup_cfg = ConfigUpdater()
+    setup_cfg.read_string(Path("pyscaffoldext-some_extension/setup.cfg").read_text())
+    entry_point = setup_cfg.get("options.entry_points", "pyscaffold.cli").value
+    expected = [
+        "first_ext = pyscaffoldext.some_extension.lazy:FirstExt",
+        "second_ext = pyscaffoldext.some_extension.lazy:SecondExt",
+    ]
+    assert entry_point.split() == " ".join(expected).split()
+
+    pkg = Path("pyscaffoldext-some_extension/src/pyscaffoldext/some_extension")
+    assert not (pkg / "extension.py").exists()
+    assert "class SecondExt(Extension)" in (pkg / "second_ext.py").read_text()
+    dispatcher = (pkg / "lazy.py").read_text()
+    assert "class FirstExt(LazyExtension)" in dispatcher
+    assert '"pyscaffoldext.some_extension.first_ext:FirstExt"' in dispatcher
+    compile(dispatcher, "lazy.py", "exec")
+
+
+def test_multiple_entry_points_reach_cli(tmpfolder, monkeypatch):
+    names = ["first_ext", "second_ext", "third_ext"]
+    project = "pyscaffoldext-some_extension"
+    args = ["--no-config", "--custom-extension", project, "--extension-names", *names]
+    cli.main(args)
+
+    # Register the generated entry points, as if the project was installed
+    setup_cfg = ConfigUpdater()
+    setup_cfg.read_string(Path(project, "setup.cfg").read_text())
+    values = setup_cfg.get("options.entry_points", "pyscaffold.cli").value
+    generated = [
+        EntryPoint(name.strip(), value.strip(), "pyscaffold.cli")
+        for name, _, value in (line.partition("=") for line in values.split("\n"))
+        if name.strip()
+    ]
+    installed = list(iterate_entry_points())
+    all_entry_points = installed + generated
+    monkeypatch.setattr(ext_module, "iterate_entry_points", lambda *_: all_entry_points)
+    monkeypatch.syspath_prepend(str(Path(project, "src").resolve()))
+
+    flags = ["--first-ext", "--second-ext", "--third-ext"]
+    opts = cli.parse_args([*flags, "other-project"])
+    extensions = {e.name: e for e in opts["extensions"]}
+    assert set(names) <= set(extensions)
+
+    # Only the proxy is imported, until the extension is activated
+    actual = extensions["second_ext"].load()
+    assert type(actual).__module__ == "pyscaffoldext.some_extension.second_ext"
+    assert type(actual).__name__ == "SecondExt"
+
+
+def test_invalid_extension_name(tmpfolder):
+    args = ["--no-config", "--custom-extension", "pyscaffoldext-some_extension"]
+    # --no-config: avoid extra config from dev's machine interference
+    with pytest.raises(InvalidExtensionName):
+        cli.main([*args, "--extension-names", "lazy", "other"])
+
+
+@pytest.mark.parametrize("persisted", [True, False])
+def test_update_multiple_entry_points(tmpfolder, persisted):
+    project = "pyscaffoldext-some_extension"
+    args = ["--no-config", "--custom-extension", project]
+    cli.main([*args, "--extension-names", "first_ext", "second_ext"])
+
+    setupcfg_path = Path(project, "setup.cfg")
+    setup_cfg = ConfigUpdater()
+    setup_cfg.read_string(setupcfg_path.read_text())
+    names = setup_cfg.get("pyscaffold", "extension_names").value
+    assert names.split() == ["first_ext", "second_ext"]
+    if not persisted:  # e.g. projects generated by older versions
+        setup_cfg.remove_option("pyscaffold", "extension_names")
+        setupcfg_path.write_text(str(setup_cfg))
+        git("commit", "-qam", "Forget extension names", cwd=project)
+
+    cli.main(["--no-config", "--update", project])
+
+    pkg = Path(project, "src/pyscaffoldext/some_extension")
+    assert not (pkg / "extension.py").exists()
+    files = {p.name for p in pkg.iterdir()}
+    assert {"first_ext.py", "second_ext.py", "lazy.py"} <= files
+    setup_cfg.read_string(setupcfg_path.read_text())
+    entry_point = setup_cfg.get("options.entry_points", "pyscaffold.cli").value
+    assert "first_ext = pyscaffoldext.some_extension.lazy:FirstExt" in entry_point
+    assert "extension:" not in entry_point
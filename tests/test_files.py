@@ -15,3 +15,25 @@ def test_files(tmpfolder):
     )
     for file in files:
         assert Path("pyscaffoldext-some_extension", file).exists()
+
+
+def test_ci_caches_and_system_tests(tmpfolder):
+    args = ["--no-config", "--custom-extension", "pyscaffoldext-some_extension"]
+    # --no-config: avoid extra config from dev's machine interference
+    cli.main(args)
+    project = Path("pyscaffoldext-some_extension")
+
+    cirrus = (project / ".cirrus.yml").read_text()
+    assert cirrus.count("system_test_task:") == 1
+    assert '--shard "${SHARD}"' in cirrus
+    assert "SHARD: 1/1" in cirrus
+    # caches of the tasks generated by PyScaffold are also keyed on setup.cfg/tox.ini
+    assert '"${CIRRUS_OS}-${CIRRUS_TASK_NAME}" | cat - setup.cfg\n' in cirrus
+    assert '"${CIRRUS_OS}-${CIRRUS_TASK_NAME}" | cat - setup.cfg tox.ini' in cirrus
+    assert cirrus.count("tox_cache:") == 2
+
+    publish = (project / ".github/workflows/publish-package.yml").read_text()
+    assert "cache-dependency-path: setup.cfg" in publish
+    assert "hashFiles('setup.cfg', 'tox.ini')" in publish
+    assert "actions/setup-python@v5" in publish
+    assert "actions/cache@v4" in publish
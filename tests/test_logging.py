@@ -0,0 +1,73 @@
+import logging
+from threading import Barrier, Thread
+
+from pyscaffold.log import logger
+
+from .conftest import captured_logs
+
+
+def test_isolated_logger_captures(isolated_logger):
+    logger.level = logging.INFO
+    logger.report("create", "some/file.py")
+    assert "some/file.py" in isolated_logger.getvalue()
+
+
+def test_isolated_logger_captures_threads(isolated_logger):
+    logger.level = logging.INFO
+    threads = [Thread(target=logger.report, args=("run", f"cmd{i}")) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(f"cmd{i}" in isolated_logger.getvalue() for i in range(5))
+
+
+POOLED_TESTS = """
+import logging
+
+import pytest
+from pyscaffold.log import logger
+
+SEEN = []
+
+
+@pytest.mark.parametrize("i", range(5))
+def test_pooled(i, isolated_logger):
+    SEEN.append((logger.wrapped, len(logging.Logger.manager.loggerDict)))
+    assert all(wrapped is SEEN[0][0] for wrapped, _ in SEEN)
+    assert all(size == SEEN[0][1] for _, size in SEEN)
+    logger.level = logging.INFO
+    logger.report("run", f"test{i}")
+    assert isolated_logger.getvalue().count("test") == 1  # fresh buffer per test
+"""
+
+
+def test_isolated_logger_concurrent_threads(isolated_logger):
+    logger.level = logging.INFO
+    barrier = Barrier(2)
+    captured = {}
+
+    def _run_test(name):
+        with captured_logs() as buffer:
+            barrier.wait()  # both "tests" are capturing at the same time
+            for i in range(3):
+                logger.report("run", f"{name}-{i}")
+            barrier.wait()
+            captured[name] = buffer.getvalue()
+
+    threads = [Thread(target=_run_test, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(f"first-{i}" in captured["first"] for i in range(3))
+    assert all(f"second-{i}" in captured["second"] for i in range(3))
+    assert "second" not in captured["first"] and "first" not in captured["second"]
+    assert isolated_logger.getvalue() == ""  # the main thread did not log anything
+
+
+def test_isolated_logger_is_pooled(generated_conftest):
+    pytester = generated_conftest(POOLED_TESTS)
+    result = pytester.runpytest("pkg", "-p", "no:cacheprovider")
+    result.assert_outcomes(passed=5)
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from pyscaffold.operations import no_overwrite
+from pyscaffold.structure import create_structure
+
+from pyscaffoldext.custom_extension.operations import stream
+
+
+def test_stream_file(tmpfolder):
+    source = Path("source.bin")
+    source.write_bytes(bytes(range(256)) * 100)
+
+    struct = {"fixtures": {"copy.bin": ("", stream(source))}}
+    changed, _ = create_structure(struct, {"project_path": Path("proj")})
+
+    assert Path("proj/fixtures/copy.bin").read_bytes() == source.read_bytes()
+    assert "copy.bin" in changed["fixtures"]
+
+
+def test_stream_chunks(tmpfolder):
+    def chunks(opts):
+        yield f"# {opts['name']}\n"
+        yield from (b"%d\n" % i for i in range(3))
+
+    struct = {"big.txt": ("", no_overwrite(stream(chunks)))}
+    create_structure(struct, {"project_path": Path("proj"), "name": "proj"})
+
+    assert Path("proj/big.txt").read_text() == "# proj\n0\n1\n2\n"
+
+
+def test_stream_pretend(tmpfolder):
+    def chunks(_opts):
+        raise AssertionError("contents should not be produced with pretend")
+
+    opts = {"project_path": Path("proj"), "pretend": True}
+    missing = Path("does-not-exist.bin")
+    struct = {"data": {"a.bin": ("", stream(chunks)), "b.bin": ("", stream(missing))}}
+    changed, _ = create_structure(struct, opts)
+
+    assert set(changed["data"]) == {"a.bin", "b.bin"}
+    assert not Path("proj").exists()
@@ -0,0 +1,67 @@
+import contextlib
+import json
+import tracemalloc
+from pathlib import Path
+
+from pyscaffold import cli
+
+from pyscaffoldext.custom_extension import profiling
+from pyscaffoldext.custom_extension.profiling import memory_profile
+
+
+def test_profile_memory(tmpfolder):
+    args = [
+        "--no-config",  # <- Avoid extra config from dev's machine interference
+        "--custom-extension",
+        "pyscaffoldext-some_extension",
+        "--profile-memory",
+        "report.jsonl",
+    ]
+    cli.main(args)
+    lines = Path("report.jsonl").read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+
+    actions = {record["action"] for record in records}
+    expected = {
+        "process_options",
+        "add_doc_requirements",
+        "add_files",
+        "add_system_tests_ci",
+    }
+    assert actions == expected
+    assert len(records) == 4  # one record per action
+    own_files = (profiling.__file__, contextlib.__file__, tracemalloc.__file__)
+    for record in records:
+        assert record["peak_bytes"] >= 0
+        assert all(":" in site["site"] for site in record["top"])
+        sites = [site["site"].rpartition(":")[0] for site in record["top"]]
+        assert not set(sites) & set(own_files)  # profiler's allocations are ignored
+
+    cli.main([*args[:2], "pyscaffoldext-other_extension", *args[3:]])
+    assert len(Path("report.jsonl").read_text().splitlines()) == 8  # appended
+
+
+def test_no_profile_by_default(tmpfolder):
+    args = ["--no-config", "--custom-extension", "pyscaffoldext-some_extension"]
+    # --no-config: avoid extra config from dev's machine interference
+    cli.main(args)
+    assert not list(Path(".").glob("*.jsonl"))
+
+
+def test_unknown_peak(tmpfolder, monkeypatch):
+    # Python < 3.9 cannot reset the peak when tracemalloc is already tracing
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    opts = {"profile_memory": "report.jsonl"}
+    tracemalloc.start()
+    try:
+        with memory_profile("action", opts):
+            _ = [0] * 1000
+    finally:
+        tracemalloc.stop()
+    with memory_profile("action", opts):  # not tracing before the action
+        _ = [0] * 1000
+
+    lines = Path("report.jsonl").read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[0]["peak_bytes"] is None
+    assert records[1]["peak_bytes"] > 0
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+from configupdater import ConfigUpdater
+from pyscaffold import cli
+
+
+def test_pytest_config(tmpfolder):
+    args = ["--no-config", "--custom-extension", "pyscaffoldext-some_extension"]
+    # --no-config: avoid extra config from dev's machine interference
+    cli.main(args)
+
+    setup_cfg = ConfigUpdater()
+    setup_cfg.read_string(Path("pyscaffoldext-some_extension/setup.cfg").read_text())
+    pytest_section = setup_cfg["tool:pytest"]
+
+    addopts = pytest_section["addopts"].value
+    assert '-m "not slow and not system"' in addopts
+    assert "--numprocesses auto" in addopts
+    assert "--cov" in addopts  # original options are kept
+
+    markers = pytest_section["markers"].value
+    assert "slow:" in markers
+    assert "system:" in markers
+    assert "# markers =" not in str(pytest_section)  # no commented example left
+
+    test_file = "pyscaffoldext-some_extension/tests/test_custom_extension.py"
+    assert "@pytest.mark.system" in Path(test_file).read_text()
+
+
+SHARDED_TESTS = """
+import pytest
+
+
+@pytest.mark.parametrize("i", range(3))
+def test_sharded(i):
+    pass
+"""
+
+
+def test_shard(generated_conftest):
+    pytester = generated_conftest(SHARDED_TESTS, source="template")
+    result = pytester.runpytest("pkg", "--shard", "1/2")
+    result.assert_outcomes(passed=2, deselected=1)
+    result = pytester.runpytest("pkg", "--shard", "2/2")
+    result.assert_outcomes(passed=1, deselected=2)
+    result = pytester.runpytest("pkg", "--shard", "5/5")
+    assert result.ret == 0  # a shard might not get any test
+    result.assert_outcomes(deselected=3)
+
+
+@pytest.mark.parametrize("shard", ["0/2", "3/2", "1", "a/b", "1/0"])
+def test_invalid_shard(generated_conftest, shard):
+    pytester = generated_conftest(SHARDED_TESTS, source="template")
+    result = pytester.runpytest("pkg", "--shard", shard)
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*--shard*"])
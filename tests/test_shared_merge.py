@@ -0,0 +1,84 @@
+from pyscaffold import actions, api, structure
+from pyscaffold.operations import create, no_overwrite
+from pyscaffold.structure import define_structure, merge
+
+from pyscaffoldext.custom_extension.extension import (
+    add_doc_requirements,
+    add_files,
+    process_options,
+    shared_merge,
+)
+
+from .benchmark_merge import main as benchmark
+
+NO_OVERWRITE = no_overwrite()
+
+
+def example_structure():
+    return {
+        "assets": {f"{i}.txt": (f"asset {i}", NO_OVERWRITE) for i in range(10)},
+        "docs": {"requirements.txt": ("sphinx\n", create), "conf.py": "# conf"},
+        "setup.cfg": "[metadata]",
+    }
+
+
+def test_shared_merge_equivalent_to_merge():
+    old = example_structure()
+    new = {
+        "docs": {"requirements.txt": (None, NO_OVERWRITE), "index.rst": "index"},
+        "setup.cfg": ("[options]", None),
+        "src": {"pkg": {"__init__.py": ""}},
+        "assets": None,
+    }
+    assert shared_merge(old, new) == merge(old, new)
+    assert old == example_structure()  # input is not modified
+
+
+def test_shared_merge_list_leaves_equivalent_to_merge():
+    old = example_structure()
+    old["setup.py"] = ["# setup", NO_OVERWRITE]
+    new = {
+        "docs": {"requirements.txt": [None, NO_OVERWRITE], "conf.py": ["# new", None]},
+        "setup.py": [None, create],
+        "setup.cfg": ["[options]", NO_OVERWRITE],
+    }
+    assert shared_merge(old, new) == merge(old, new)
+
+
+def test_shared_merge_shares_untouched_nodes():
+    old = example_structure()
+    merged = shared_merge(old, {"docs": {"index.rst": "index"}})
+    assert merged["assets"] is old["assets"]
+    assert merged["docs"] is not old["docs"]
+    assert merged["docs"]["conf.py"] is old["docs"]["conf.py"]
+    assert "index.rst" not in old["docs"]
+
+
+def test_add_doc_requirements_shares_structure():
+    struct = example_structure()
+    new_struct, _ = add_doc_requirements(struct, {})
+    assert new_struct["assets"] is struct["assets"]
+    assert new_struct["docs"]["requirements.txt"] == ("pyscaffold\nsphinx\n", create)
+    assert struct["docs"]["requirements.txt"] == ("sphinx\n", create)
+
+
+def test_add_files_does_not_deep_copy(tmpfolder, monkeypatch):
+    opts = api.bootstrap_options(project_path="proj", config_files=api.NO_CONFIG)
+    struct, opts = actions.get_default_options({}, opts)
+    struct, opts = define_structure(struct, opts)
+    struct, opts = process_options(struct, opts)
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("the project structure should not be deep copied")
+
+    monkeypatch.setattr(structure, "deepcopy", _fail)  # used by ``merge``
+    new_struct, _ = add_files(struct, opts)
+    new_struct, _ = add_doc_requirements(new_struct, opts)
+    assert new_struct["LICENSE.txt"] is struct["LICENSE.txt"]
+    assert new_struct["docs"]["conf.py"] is struct["docs"]["conf.py"]
+
+
+def test_benchmark(capsys):
+    assert benchmark(["--dirs", "2", "--files", "2", "--number", "1"]) == 0
+    out = capsys.readouterr().out
+    assert "shared_merge" in out
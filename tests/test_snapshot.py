@@ -0,0 +1,85 @@
+import re
+from pathlib import Path
+
+import pytest
+from configupdater import ConfigUpdater
+from pyscaffold import cli
+
+from .helpers import assert_manifest
+
+GOLDEN = Path(__file__).parent / "snapshots" / "some_extension.json"
+
+OWNED_FILES = (
+    "README.rst",
+    "CONTRIBUTING.rst",
+    ".cirrus.yml",
+    ".github/**/*",
+    "setup.cfg",
+    "src/**/extension.py",
+    "tests/**/*.py",
+)
+"""Files generated (or modified) by this extension"""
+
+SETUPCFG_OPTIONS = (
+    ("options", "install_requires"),
+    ("options.extras_require", "testing"),
+    ("options.entry_points", "pyscaffold.cli"),
+    ("tool:pytest", "addopts"),
+    ("tool:pytest", "markers"),
+)
+"""Options in ``setup.cfg`` set by this extension"""
+
+REPLACEMENTS = ((r"pyscaffold>=[^,\s]+,<\d+\.0a0", "pyscaffold>=<MIN>,<<NEXT_MAJOR>"),)
+
+
+def setupcfg_view(text: str) -> str:
+    """Only the options modified by this extension (the remaining parts of
+    ``setup.cfg`` come from PyScaffold's templates, that change between versions)
+    """
+    setupcfg = ConfigUpdater()
+    setupcfg.read_string(text)
+    values = []
+    for section, option in SETUPCFG_OPTIONS:
+        value = setupcfg.get(section, option).value or ""
+        lines = [v.strip() for v in value.splitlines() if v.strip()]
+        if option == "install_requires":
+            lines = [v for v in lines if v.startswith("pyscaffold")]
+        values.append(f"[{section}] {option} = {lines}")
+    return "\n".join(values)
+
+
+CIRRUS_CACHES = re.compile(r"^ +(?:pip|tox)_cache:\n(?: {4,}.*\n)*", re.MULTILINE)
+
+
+def cirrus_view(text: str) -> str:
+    """Only the caches modified and the tasks appended by this extension (see
+    ``setupcfg_view``)
+    """
+    _, marker, appended = text.partition("# ---- Slow/system tests ----")
+    return "".join(CIRRUS_CACHES.findall(text)) + marker + appended
+
+
+VIEWS = {"setup.cfg": setupcfg_view, ".cirrus.yml": cirrus_view}
+
+
+def test_snapshot(tmpfolder):
+    args = ["--no-config", "--custom-extension", "pyscaffoldext-some_extension"]
+    # --no-config: avoid extra config from dev's machine interference
+    cli.main(args)
+    opts = dict(patterns=OWNED_FILES, replacements=REPLACEMENTS, views=VIEWS)
+    assert_manifest("pyscaffoldext-some_extension", GOLDEN, **opts)
+
+
+def test_missing_golden_file(tmpfolder, monkeypatch):
+    monkeypatch.delenv("UPDATE_SNAPSHOTS", raising=False)
+    Path("project").mkdir()
+    Path("project/file.txt").write_text("contents")
+    golden = Path("missing.json")
+    with pytest.raises(AssertionError, match="UPDATE_SNAPSHOTS"):
+        assert_manifest("project", golden)
+    assert not golden.exists()
+
+    monkeypatch.setenv("UPDATE_SNAPSHOTS", "1")
+    assert_manifest("project", golden)
+    monkeypatch.delenv("UPDATE_SNAPSHOTS")
+    assert_manifest("project", golden)
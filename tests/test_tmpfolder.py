@@ -0,0 +1,37 @@
+import shutil
+
+import pytest
+
+from .helpers import RAM_MIN_FREE
+
+TMPFOLDER_TESTS = """
+import pytest
+
+
+@pytest.mark.parametrize("i", range(4))
+def test_workspace(tmpfolder, i):
+    assert tmpfolder.exists()
+"""
+
+
+@pytest.mark.parametrize("source", ["repo", "template"])
+def test_tmpfolder_timings_with_xdist(generated_conftest, monkeypatch, source):
+    monkeypatch.delenv("TMPFOLDER_RAM", raising=False)
+    pytester = generated_conftest(TMPFOLDER_TESTS, source)
+
+    result = pytester.runpytest_subprocess("pkg", "-n", "2")
+    result.assert_outcomes(passed=4)
+    result.stdout.no_fnmatch_line("*tmpfolder workspaces*")  # RAM never used
+    assert not list(pytester.path.glob(".pytest_cache/v/tmpfolder/*"))
+
+    if shutil.disk_usage(str(pytester.path)).free < RAM_MIN_FREE:
+        pytest.skip("not enough space to use the test directory as 'RAM' workspace")
+    monkeypatch.setenv("TMPFOLDER_RAM", str(pytester.path))  # any directory works
+    result = pytester.runpytest_subprocess("pkg", "-n", "2")
+    result.assert_outcomes(passed=4)
+    result.stdout.fnmatch_lines(["*tmpfolder workspaces*", "ram: 4 tests, *this run)"])
+
+    monkeypatch.delenv("TMPFOLDER_RAM")
+    result = pytester.runpytest_subprocess("pkg", "-n", "2")
+    expected = ["ram: 4 tests, *previous run)", "disk: 4 tests, *this run)"]
+    result.stdout.fnmatch_lines(expected)